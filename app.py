@@ -8,13 +8,17 @@ import json
 import numpy as np
 from datetime import datetime
 import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import base64
-from PIL import Image
-import folium
-from streamlit_folium import st_folium
-import geopandas as gpd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from numba import njit
+from rustpy_xlsxwriter import FastExcel
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Page configuration
 st.set_page_config(
@@ -77,33 +81,127 @@ COUNTRY_CODES = {
     'NPL': 'Nepal'
 }
 
-# Function to load data from Excel files
-@st.cache_data
-def load_country_data(country_code):
-    """Load data for a specific country from Excel file"""
+# Function to pick where Parquet caches are kept
+@st.cache_resource
+def get_cache_dir():
+    """Use the data directory when writable, otherwise an app-specific temp directory"""
+    if os.access("Bilateral Debt Data", os.W_OK):
+        return "Bilateral Debt Data"
+    cache_dir = os.path.join(tempfile.gettempdir(), "world-bank-debt-analysis-cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+# Function to write a Parquet cache without ever leaving a partial file behind
+def write_cache(df, cache_path):
+    """Write df to a temporary file next to cache_path, then atomically move it into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".parquet.tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, compression="snappy")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Function to check that a Parquet cache can be read
+def is_readable_cache(cache_path):
+    """Check the cache's footer, which a truncated or corrupt file will fail to parse"""
+    try:
+        pq.read_metadata(cache_path)
+        return True
+    except (pa.ArrowException, OSError):
+        return False
+
+# Function to cache Excel files as Parquet
+def cache_country_data(country_code, cache_dir):
+    """Make sure a country's Excel file has an up-to-date Parquet cache and return its path"""
     try:
         file_path = f"Bilateral Debt Data/{country_code}-646 PPG Bilateral Debt.xlsx"
-        df = pd.read_excel(file_path)
-        return df
+        cache_path = os.path.join(cache_dir, f"{country_code}.parquet")
+        
+        # Reuse the Parquet cache unless the Excel file has been updated since or it is unreadable
+        if (
+            os.path.exists(cache_path) and
+            os.path.getmtime(cache_path) >= os.path.getmtime(file_path) and
+            is_readable_cache(cache_path)
+        ):
+            return cache_path
+        
+        df = pd.read_excel(file_path, engine="calamine")
+        write_cache(df, cache_path)
+        return cache_path
     except Exception as e:
         st.error(f"Error loading data for {country_code}: {str(e)}")
         return None
 
+# Function to read country caches one at a time
+def read_country_caches(path_codes, cache_dir):
+    """Read each country's cache separately, rebuilding any that cannot be read"""
+    all_data = []
+    
+    for path, country_code in path_codes.items():
+        try:
+            df = pd.read_parquet(path)
+        except (pa.ArrowException, OSError):
+            # Drop the unreadable cache and convert the Excel file again
+            os.remove(path)
+            rebuilt_path = cache_country_data(country_code, cache_dir)
+            if rebuilt_path is None:
+                continue
+            try:
+                df = pd.read_parquet(rebuilt_path)
+            except (pa.ArrowException, OSError) as e:
+                st.error(f"Error loading data for {country_code}: {str(e)}")
+                continue
+        df['Country'] = COUNTRY_CODES[country_code]
+        df['Country_Code'] = country_code
+        all_data.append(df)
+    
+    if all_data:
+        return pd.concat(all_data, ignore_index=True)
+    return None
+
 # Function to load all data
 @st.cache_data
 def load_all_data():
     """Load all country data and combine into one dataframe"""
-    all_data = []
+    # Each conversion is an independent read, so run them concurrently; worker threads
+    # share the script context so st.error behaves as in the main thread
+    cache_dir = get_cache_dir()
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=len(COUNTRY_MAPPING),
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+    ) as executor:
+        cache_paths = list(executor.map(
+            cache_country_data, COUNTRY_MAPPING.values(), [cache_dir] * len(COUNTRY_MAPPING)
+        ))
     
-    for country_name, country_code in COUNTRY_MAPPING.items():
-        df = load_country_data(country_code)
-        if df is not None:
-            df['Country'] = country_name
-            df['Country_Code'] = country_code
-            all_data.append(df)
+    path_codes = {
+        path: country_code
+        for country_code, path in zip(COUNTRY_MAPPING.values(), cache_paths)
+        if path is not None
+    }
     
-    if all_data:
-        combined_df = pd.concat(all_data, ignore_index=True)
+    if path_codes:
+        try:
+            # Read every cache in one multi-threaded Arrow scan and convert to pandas once,
+            # instead of building and concatenating a DataFrame per country
+            dataset = ds.dataset(list(path_codes), format="parquet")
+            combined_df = dataset.to_table().to_pandas()
+            
+            # The scan keeps file order, so each file's row count (from its footer) labels its rows
+            row_counts = [fragment.count_rows() for fragment in dataset.get_fragments()]
+            country_codes = np.repeat(list(path_codes.values()), row_counts)
+            combined_df['Country'] = [COUNTRY_CODES[code] for code in country_codes]
+            combined_df['Country_Code'] = country_codes
+        except (pa.ArrowException, OSError):
+            # A cache went bad past its footer; fall back to reading and repairing them one by one
+            combined_df = read_country_caches(path_codes, cache_dir)
+            if combined_df is None:
+                return None
+        
         # Clean and standardize column names
         combined_df.columns = [col.strip() for col in combined_df.columns]
         
@@ -113,13 +211,17 @@ def load_all_data():
         return combined_df
     return None
 
-# Load data
-with st.spinner("Loading debt data..."):
-    all_data = load_all_data()
-
-if all_data is None:
-    st.error("Failed to load data. Please check if the data files are available.")
-    st.stop()
+# Function to compute year-over-year growth, compiled since it is a sequential loop
+@njit(error_model='numpy')
+def yoy_growth(codes, values):
+    """Percentage change from the previous row, restarting wherever the country code changes"""
+    growth = np.empty(len(values), dtype=values.dtype)
+    for i in range(len(values)):
+        if i == 0 or codes[i] != codes[i - 1]:
+            growth[i] = np.nan
+        else:
+            growth[i] = (values[i] / values[i - 1] - 1.0) * 100.0
+    return growth
 
 # Data preprocessing
 def preprocess_data(df):
@@ -130,22 +232,101 @@ def preprocess_data(df):
     # Remove rows with missing values
     df = df.dropna()
     
-    # Convert year to datetime if it's not already
+    # Keep year as a compact integer; it is only ever compared and displayed
     if 'year' in df.columns:
-        df['year'] = pd.to_datetime(df['year'], format='%Y')
+        df['year'] = df['year'].astype('int16')
     
     # Convert debt amounts to numeric, removing any currency symbols
     if 'data' in df.columns:
         df['data'] = pd.to_numeric(df['data'], errors='coerce')
     
+    # Store country labels as categoricals so grouping works on integer codes
+    df['Country'] = df['Country'].astype('category')
+    df['Country_Code'] = df['Country_Code'].astype('category')
+    
     # Calculate year-over-year growth percentage
     df = df.sort_values(['Country', 'year'])
-    df['YoY Growth %'] = df.groupby('Country')['data'].pct_change() * 100
+    df['YoY Growth %'] = yoy_growth(df['Country'].cat.codes.to_numpy(), df['data'].to_numpy())
     
     return df
 
-# Preprocess the data
-all_data = preprocess_data(all_data)
+# Grouped aggregations switch to the numba engine from this many rows, where the
+# one-off JIT compile pays for itself; the bundled country files are far smaller
+NUMBA_MIN_ROWS = 100_000
+NUMBA_ENGINE_KWARGS = {"parallel": True, "nogil": True, "nopython": True}
+
+# Function to aggregate debt and growth statistics per country
+def aggregate_by_country(df, engine=None):
+    """Compute per-country debt and growth statistics in one grouped pass"""
+    # Growth from a zero base is infinite, and the numba and cython reductions disagree on
+    # infinities (a NaN vs an inf mean), so both engines treat it as undefined
+    df = df.assign(**{'YoY Growth %': df['YoY Growth %'].replace([np.inf, -np.inf], np.nan)})
+    
+    if engine is None:
+        engine = 'numba' if len(df) >= NUMBA_MIN_ROWS and numba_engine_agrees() else 'cython'
+    
+    if engine == 'cython':
+        return df.groupby('Country', observed=True).agg(
+            total=('data', 'sum'),
+            mean=('data', 'mean'),
+            std=('data', 'std'),
+            min=('data', 'min'),
+            max=('data', 'max'),
+            growth_mean=('YoY Growth %', 'mean'),
+            growth_std=('YoY Growth %', 'std'),
+            growth_min=('YoY Growth %', 'min'),
+            growth_max=('YoY Growth %', 'max')
+        )
+    
+    # The numba engine only accepts the built-in reductions one at a time
+    grouped = df.groupby('Country', observed=True)[['data', 'YoY Growth %']]
+    reduced = {
+        func: getattr(grouped, func)(engine='numba', engine_kwargs=NUMBA_ENGINE_KWARGS)
+        for func in ['sum', 'mean', 'std', 'min', 'max']
+    }
+    return pd.DataFrame({
+        'total': reduced['sum']['data'],
+        'mean': reduced['mean']['data'],
+        'std': reduced['std']['data'],
+        'min': reduced['min']['data'],
+        'max': reduced['max']['data'],
+        'growth_mean': reduced['mean']['YoY Growth %'],
+        'growth_std': reduced['std']['YoY Growth %'],
+        'growth_min': reduced['min']['YoY Growth %'],
+        'growth_max': reduced['max']['YoY Growth %']
+    })
+
+# Function to load and preprocess all data
+@st.cache_data
+def get_preprocessed_data():
+    """Load all country data and preprocess it once, rather than on every rerun"""
+    all_data = load_all_data()
+    if all_data is None:
+        return None
+    return preprocess_data(all_data)
+
+# Function to check the numba aggregation against the cython one
+@st.cache_resource
+def numba_engine_agrees():
+    """Compare both engines once per process on the loaded data, compiling the numba kernels"""
+    all_data = get_preprocessed_data()
+    numba_stats = aggregate_by_country(all_data, engine='numba')
+    cython_stats = aggregate_by_country(all_data, engine='cython')
+    return numba_stats.index.equals(cython_stats.index) and np.allclose(
+        numba_stats.to_numpy(dtype=float), cython_stats.to_numpy(dtype=float), rtol=1e-6, equal_nan=True
+    )
+
+# Load data
+with st.spinner("Loading debt data..."):
+    all_data = get_preprocessed_data()
+    
+    # Compile and verify the numba kernels during loading rather than on the first interaction
+    if all_data is not None and len(all_data) >= NUMBA_MIN_ROWS:
+        numba_engine_agrees()
+
+if all_data is None:
+    st.error("Failed to load data. Please check if the data files are available.")
+    st.stop()
 
 # Sidebar controls
 st.sidebar.markdown("### Analysis Settings")
@@ -159,8 +340,8 @@ selected_countries = st.sidebar.multiselect(
 
 # Time period selection
 if 'year' in all_data.columns:
-    min_year = all_data['year'].dt.year.min()
-    max_year = all_data['year'].dt.year.max()
+    min_year = all_data['year'].min()
+    max_year = all_data['year'].max()
     
     year_range = st.sidebar.slider(
         "Select Year Range:",
@@ -172,17 +353,135 @@ if 'year' in all_data.columns:
 else:
     year_range = (2000, 2020)
 
-# Filter data based on selections
-filtered_data = all_data[
-    (all_data['Country'].isin(selected_countries)) &
-    (all_data['year'].dt.year >= year_range[0]) &
-    (all_data['year'].dt.year <= year_range[1])
-]
+# Per-selection caches are shared by every session, so keep only the most recent selections
+SELECTION_CACHE_ENTRIES = 32
+
+# Function to filter data, cached per selection so repeated reruns skip the scan
+@st.cache_data(max_entries=SELECTION_CACHE_ENTRIES)
+def filter_data(countries: tuple, yr_lo: int, yr_hi: int) -> pd.DataFrame:
+    """Filter the preprocessed data to the selected countries and year range"""
+    all_data = get_preprocessed_data()
+    
+    # Match on the int8 category codes and int16 years rather than hashing country labels
+    selected_codes = all_data['Country'].cat.categories.get_indexer(countries)
+    years = all_data['year'].to_numpy()
+    mask = (
+        np.isin(all_data['Country'].cat.codes.to_numpy(), selected_codes) &
+        (years >= yr_lo) &
+        (years <= yr_hi)
+    )
+    filtered = all_data[mask].copy()
+    
+    # Drop deselected countries from the categories so charts and tables skip them
+    filtered['Country'] = filtered['Country'].cat.remove_unused_categories()
+    filtered['Country_Code'] = filtered['Country_Code'].cat.remove_unused_categories()
+    return filtered
+
+# Function to reduce the data to what the time-series charts plot
+def get_plot_data(countries: tuple, yr_lo: int, yr_hi: int) -> pd.DataFrame:
+    """Aggregate the filtered data to one point per country and year"""
+    # Only the charted points are sent to the browser, never the raw rows
+    filtered = filter_data(countries, yr_lo, yr_hi)
+    plot_data = filtered.groupby(['Country', 'year'], observed=True, as_index=False).agg(
+        {'data': 'sum', 'YoY Growth %': 'mean'}
+    )
+    
+    # plotly express groups traces without observed=True, so countries go in as strings
+    return plot_data.astype({'Country': str})
+
+# Function to reduce the data to what the country total charts plot
+def get_country_totals(countries: tuple, yr_lo: int, yr_hi: int) -> pd.DataFrame:
+    """Aggregate the filtered data to one total per country"""
+    filtered = filter_data(countries, yr_lo, yr_hi)
+    return filtered.groupby('Country', observed=True, as_index=False)['data'].sum()
+
+# Functions to build the charts, cached per selection so reruns reuse the figure objects
+@st.cache_resource(max_entries=SELECTION_CACHE_ENTRIES)
+def build_trends_fig(countries: tuple, yr_lo: int, yr_hi: int) -> go.Figure:
+    """Line chart of debt over time for each selected country"""
+    fig = px.line(
+        get_plot_data(countries, yr_lo, yr_hi),
+        x='year',
+        y='data',
+        color='Country',
+        title='Debt Trends by Country Over Time',
+        labels={'data': 'Debt Amount (USD)', 'year': 'Year'},
+        hover_data=['YoY Growth %'],
+        render_mode='webgl'
+    )
+    fig.update_layout(height=500)
+    return fig
+
+@st.cache_resource(max_entries=SELECTION_CACHE_ENTRIES)
+def build_growth_fig(countries: tuple, yr_lo: int, yr_hi: int) -> go.Figure:
+    """Bar chart of year-over-year growth rates for each selected country"""
+    fig = px.bar(
+        get_plot_data(countries, yr_lo, yr_hi),
+        x='year',
+        y='YoY Growth %',
+        color='Country',
+        title='Year-over-Year Growth Rates',
+        labels={'YoY Growth %': 'Growth Rate (%)'}
+    )
+    fig.update_layout(height=400)
+    return fig
+
+@st.cache_resource(max_entries=SELECTION_CACHE_ENTRIES)
+def build_totals_fig(countries: tuple, yr_lo: int, yr_hi: int) -> go.Figure:
+    """Bar chart of total debt per selected country"""
+    country_totals = get_country_totals(countries, yr_lo, yr_hi)
+    fig = px.bar(
+        country_totals,
+        x='Country',
+        y='data',
+        title='Total Debt by Country',
+        color='data',
+        color_continuous_scale='viridis',
+        labels={'data': 'Total Debt (USD)'}
+    )
+    fig.update_layout(height=500)
+    return fig
+
+@st.cache_resource(max_entries=SELECTION_CACHE_ENTRIES)
+def build_distribution_fig(countries: tuple, yr_lo: int, yr_hi: int) -> go.Figure:
+    """Pie chart of each selected country's share of total debt"""
+    country_totals = get_country_totals(countries, yr_lo, yr_hi)
+    fig = px.pie(
+        country_totals,
+        values='data',
+        names='Country',
+        title='Proportion of Total Debt by Country'
+    )
+    fig.update_layout(height=400)
+    return fig
+
+@st.cache_resource(max_entries=SELECTION_CACHE_ENTRIES)
+def build_comparison_fig(countries: tuple, yr_lo: int, yr_hi: int) -> go.Figure:
+    """Line chart comparing debt over time across the selected countries"""
+    fig = px.line(
+        get_plot_data(countries, yr_lo, yr_hi),
+        x='year',
+        y='data',
+        color='Country',
+        title='Country Comparison: Debt Over Time',
+        labels={'data': 'Debt Amount (USD)'},
+        render_mode='webgl'
+    )
+    fig.update_layout(height=500)
+    return fig
+
+# Filter data based on selections; the charts don't depend on the order countries were
+# picked in, so sort them to give each selection a single cache key
+selection = (tuple(sorted(selected_countries)), year_range[0], year_range[1])
+filtered_data = filter_data(*selection)
 
 # Main content area
 if len(selected_countries) == 0:
     st.warning("Please select at least one country to analyze.")
 else:
+    # Per-country aggregates, computed once and shared by the metrics and tabs
+    country_stats = aggregate_by_country(filtered_data)
+    
     # Key metrics row
     st.markdown("### Key Metrics")
     
@@ -204,14 +503,14 @@ else:
         )
     
     with col3:
-        max_debt_year = filtered_data.loc[filtered_data['data'].idxmax(), 'year'].year
+        max_debt_year = filtered_data.loc[filtered_data['data'].idxmax(), 'year']
         st.metric(
             label="Peak Debt Year",
             value=str(max_debt_year)
         )
     
     with col4:
-        top_debtor = filtered_data.groupby('Country')['data'].sum().idxmax()
+        top_debtor = country_stats['total'].idxmax()
         st.metric(
             label="Top Debtor Country",
             value=top_debtor
@@ -224,21 +523,7 @@ else:
         st.markdown("### Debt Trends Over Time")
         
         # Line chart showing debt trends
-        # Convert datetime to string for plotting to avoid warnings
-        plot_data = filtered_data.copy()
-        plot_data['year_str'] = plot_data['year'].dt.strftime('%Y')
-        
-        fig_trends = px.line(
-            plot_data,
-            x='year_str',
-            y='data',
-            color='Country',
-            title='Debt Trends by Country Over Time',
-            labels={'data': 'Debt Amount (USD)', 'year_str': 'Year'},
-            hover_data=['YoY Growth %']
-        )
-        fig_trends.update_layout(height=500)
-        st.plotly_chart(fig_trends, use_container_width=True)
+        st.plotly_chart(build_trends_fig(*selection), use_container_width=True)
         
         # Growth rate analysis
         st.markdown("### Year-over-Year Growth Analysis")
@@ -247,91 +532,51 @@ else:
         
         with col1:
             # Growth rate chart
-            fig_growth = px.bar(
-                plot_data,
-                x='year_str',
-                y='YoY Growth %',
-                color='Country',
-                title='Year-over-Year Growth Rates',
-                labels={'YoY Growth %': 'Growth Rate (%)'}
-            )
-            fig_growth.update_layout(height=400)
-            st.plotly_chart(fig_growth, use_container_width=True)
+            st.plotly_chart(build_growth_fig(*selection), use_container_width=True)
         
         with col2:
             # Growth statistics
-            growth_stats = filtered_data.groupby('Country')['YoY Growth %'].agg(['mean', 'std', 'min', 'max']).round(2)
+            growth_stats = country_stats[['growth_mean', 'growth_std', 'growth_min', 'growth_max']].round(2)
+            growth_stats.columns = ['mean', 'std', 'min', 'max']
             st.markdown("**Growth Statistics by Country:**")
             st.dataframe(growth_stats, use_container_width=True)
 
     with tab2:
         st.markdown("### Geographic Distribution of Debt")
         
-        # Create a simple map visualization
-        country_totals = filtered_data.groupby('Country')['data'].sum().reset_index()
-        
         # Create a choropleth-like visualization using bar chart
-        fig_map = px.bar(
-            country_totals,
-            x='Country',
-            y='data',
-            title='Total Debt by Country',
-            color='data',
-            color_continuous_scale='viridis',
-            labels={'data': 'Total Debt (USD)'}
-        )
-        fig_map.update_layout(height=500)
-        st.plotly_chart(fig_map, use_container_width=True)
+        st.plotly_chart(build_totals_fig(*selection), use_container_width=True)
         
         # Debt distribution pie chart
         st.markdown("### Debt Distribution")
         
-        fig_pie = px.pie(
-            country_totals,
-            values='data',
-            names='Country',
-            title='Proportion of Total Debt by Country'
-        )
-        fig_pie.update_layout(height=400)
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(build_distribution_fig(*selection), use_container_width=True)
 
     with tab3:
         st.markdown("### Side-by-Side Country Comparison")
         
         # Multi-line comparison
-        fig_comparison = px.line(
-            plot_data,
-            x='year_str',
-            y='data',
-            color='Country',
-            title='Country Comparison: Debt Over Time',
-            labels={'data': 'Debt Amount (USD)'}
-        )
-        fig_comparison.update_layout(height=500)
-        st.plotly_chart(fig_comparison, use_container_width=True)
+        st.plotly_chart(build_comparison_fig(*selection), use_container_width=True)
         
         # Comparison table
         st.markdown("### Detailed Comparison Table")
         
-        comparison_data = filtered_data.pivot_table(
-            index='year',
-            columns='Country',
-            values='data',
-            aggfunc='sum'
-        ).fillna(0)
-        
-        # Convert index to string for display
-        comparison_data.index = comparison_data.index.strftime('%Y')
+        comparison_data = (
+            filtered_data.groupby(['year', 'Country'], observed=True)['data']
+            .sum()
+            .unstack('Country', fill_value=0)
+        )
         
         st.dataframe(comparison_data, use_container_width=True)
         
         # Statistical comparison
         st.markdown("### Statistical Summary")
         
-        stats_summary = filtered_data.groupby('Country').agg({
-            'data': ['sum', 'mean', 'std', 'min', 'max'],
-            'YoY Growth %': ['mean', 'std']
-        }).round(2)
+        stats_summary = country_stats[['total', 'mean', 'std', 'min', 'max', 'growth_mean', 'growth_std']].round(2)
+        stats_summary.columns = pd.MultiIndex.from_tuples([
+            ('data', 'sum'), ('data', 'mean'), ('data', 'std'), ('data', 'min'), ('data', 'max'),
+            ('YoY Growth %', 'mean'), ('YoY Growth %', 'std')
+        ])
         
         st.dataframe(stats_summary, use_container_width=True)
 
@@ -343,33 +588,25 @@ else:
         with col1:
             # Top debt periods
             st.markdown("**Peak Debt Periods:**")
-            peak_periods = filtered_data.nlargest(10, 'data')[['Country', 'year', 'data']].copy()
-            peak_periods['year'] = peak_periods['year'].dt.strftime('%Y')
+            peak_periods = filtered_data[['Country', 'year', 'data']].nlargest(10, 'data')
             st.dataframe(peak_periods, use_container_width=True)
         
         with col2:
             # Highest growth periods
             st.markdown("**Highest Growth Periods:**")
-            growth_periods = filtered_data.nlargest(10, 'YoY Growth %')[['Country', 'year', 'YoY Growth %']].copy()
-            growth_periods['year'] = growth_periods['year'].dt.strftime('%Y')
+            growth_periods = filtered_data[['Country', 'year', 'YoY Growth %']].nlargest(10, 'YoY Growth %')
             st.dataframe(growth_periods, use_container_width=True)
         
         # Correlation analysis
         st.markdown("### Correlation Analysis")
         
-        # Create correlation matrix for numerical columns
-        numeric_data = filtered_data.select_dtypes(include=[np.number])
-        if len(numeric_data.columns) > 1:
-            correlation_matrix = numeric_data.corr()
-            
-            fig_corr = px.imshow(
-                correlation_matrix,
-                title='Correlation Matrix of Numerical Variables',
-                color_continuous_scale='RdBu',
-                aspect='auto'
-            )
-            fig_corr.update_layout(height=400)
-            st.plotly_chart(fig_corr, use_container_width=True)
+        # Debt and YoY growth are the only measures, so their correlation is one coefficient
+        paired = filtered_data[['data', 'YoY Growth %']].replace([np.inf, -np.inf], np.nan).dropna()
+        rho = paired['data'].corr(paired['YoY Growth %'])
+        st.metric(
+            label="Debt vs YoY Growth Correlation",
+            value=f"{rho:+.2f}" if pd.notna(rho) else "N/A"
+        )
 
     with tab5:
         st.markdown("### Generate Reports")
@@ -388,12 +625,16 @@ else:
         if st.button("Generate Report"):
             with st.spinner("Generating report..."):
                 # Create a simple report
-                report_data = filtered_data.copy()
+                report_data = filtered_data
+                
+                # Format the generation time once so the report and file names agree
+                generated_at = datetime.now()
+                file_timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
                 
                 # Generate report content
                 report_content = f"""
 # World Bank Debt Analysis Report
-**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Generated on:** {generated_at.strftime('%Y-%m-%d %H:%M:%S')}
 **Analysis Period:** {report_start} to {report_end}
 **Countries Analyzed:** {', '.join(selected_countries)}
 
@@ -411,25 +652,43 @@ else:
 ## Detailed Data
 """
                 
-                # Convert report to CSV for download
-                csv = report_data.to_csv(index=False)
+                # Write the data into in-memory buffers for download
+                csv_buffer = io.BytesIO()
+                report_data.to_csv(csv_buffer, index=False)
+                csv_buffer.seek(0)
+                
+                # The xlsx writer skips categorical values, so country labels go in as strings,
+                # and it would write the filtered index as a column, so that is dropped to match the CSV
+                excel_buffer = io.BytesIO()
+                FastExcel(excel_buffer).sheet(
+                    "Report", report_data.reset_index(drop=True).astype({'Country': str, 'Country_Code': str})
+                ).save()
+                excel_buffer.seek(0)
                 
                 # Create download buttons
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 
                 with col1:
                     st.download_button(
                         label="Download Data (CSV)",
-                        data=csv,
-                        file_name=f"debt_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        data=csv_buffer,
+                        file_name=f"debt_analysis_{file_timestamp}.csv",
                         mime="text/csv"
                     )
                 
                 with col2:
+                    st.download_button(
+                        label="Download Data (Excel)",
+                        data=excel_buffer,
+                        file_name=f"debt_analysis_{file_timestamp}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+                
+                with col3:
                     st.download_button(
                         label="Download Report (TXT)",
                         data=report_content,
-                        file_name=f"debt_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                        file_name=f"debt_report_{file_timestamp}.txt",
                         mime="text/plain"
                     )
                 